@@ -0,0 +1,61 @@
+from fastapi import HTTPException
+
+from app.config import MAX_BATCH_IDS
+from app.models.career_model import CareerPath
+from app.models.insights_model import Insight
+from app.models.program_model import Program
+from app.models.university_model import University
+from app.models.university_program_model import UniversityProgram
+
+CUTOFF_COLUMNS = (
+    UniversityProgram.university_id,
+    University.name.label("university_name"),
+    UniversityProgram.program_id,
+    Program.program_name,
+    UniversityProgram.min_score_science,
+    UniversityProgram.min_score_maths,
+    UniversityProgram.min_score_literature,
+    UniversityProgram.min_score_economics,
+    UniversityProgram.min_score_info,
+)
+
+
+def unique_ids(ids):
+    """Drop repeated ids, keeping the order the client asked for."""
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids can be fetched at once.")
+    return ids
+
+
+def fetch_cutoffs(db, key_column, ids):
+    """Cutoffs of the university-program links whose `key_column` is in `ids`, grouped by that key."""
+    rows = (
+        db.query(*CUTOFF_COLUMNS)
+        .join(University, UniversityProgram.university_id == University.id)
+        .join(Program, UniversityProgram.program_id == Program.program_id)
+        .filter(key_column.in_(ids))
+        .all()
+    )
+    cutoffs = {}
+    for row in rows:
+        cutoffs.setdefault(getattr(row, key_column.key), []).append(row._asdict())
+    return cutoffs
+
+
+def fetch_insights(db, career_path_ids):
+    """First insight of every career path in `career_path_ids`, like the single career path endpoint."""
+    insights = {}
+    for insight in db.query(Insight).filter(Insight.career_path_id.in_(career_path_ids)).order_by(Insight.id):
+        insights.setdefault(insight.career_path_id, {
+            "employability_rate": insight.employability_rate,
+            "average_salary": insight.average_salary,
+        })
+    return insights
+
+
+def fetch_career_paths(db, career_path_ids):
+    return {
+        career_path.id: career_path
+        for career_path in db.query(CareerPath).filter(CareerPath.id.in_(career_path_ids))
+    }
@@ -0,0 +1,207 @@
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.config import (
+    CATALOG_CACHE_BROTLI_QUALITY,
+    CATALOG_CACHE_MAX_BYTES,
+    CATALOG_CACHE_MIN_COMPRESS_BYTES,
+    CATALOG_VERSION_CHECK_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.catalog_change_model import CatalogChange
+from app.models.career_model import CareerPath
+from app.models.insights_model import Insight
+from app.models.program_model import Program
+from app.models.university_model import University
+from app.models.university_program_model import UniversityProgram
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Tables whose content ends up in the catalog responses
+CATALOG_MODELS = (University, Program, UniversityProgram, CareerPath, Insight)
+
+# Preferred order when the client accepts several encodings with the same q-value
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+_version_lock = threading.Lock()
+_catalog_version = None
+_version_checked_at = 0.0
+
+
+def get_catalog_version():
+    """Newest sequence number of the catalog change log, shared by every worker process.
+
+    It is re-read at most every CATALOG_VERSION_CHECK_SECONDS, and right after a local catalog commit.
+    """
+    global _catalog_version, _version_checked_at
+    with _version_lock:
+        if _catalog_version is not None and time.monotonic() - _version_checked_at < CATALOG_VERSION_CHECK_SECONDS:
+            return _catalog_version
+
+        db = SessionLocal()
+        try:
+            version = db.query(func.max(CatalogChange.seq)).scalar() or 0
+        finally:
+            db.close()
+
+        if version != _catalog_version:
+            # Bodies of older versions can no longer be requested
+            response_cache.clear()
+        _catalog_version = version
+        _version_checked_at = time.monotonic()
+        return _catalog_version
+
+
+def bump_catalog_version():
+    """Make the next read pick up the catalog change this process just committed."""
+    global _version_checked_at
+    with _version_lock:
+        _version_checked_at = 0.0
+
+
+# Any committed write to a catalog table is logged in the change log, which moves the catalog to a new version
+@event.listens_for(Session, "after_flush")
+def _track_catalog_writes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info["catalog_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("catalog_changed", False):
+        bump_catalog_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("catalog_changed", None)
+
+
+class CompressedResponseCache:
+    """LRU cache of serialized response bodies and their compressed variants, bounded in bytes."""
+
+    def __init__(self, max_bytes, min_compress_bytes):
+        self.max_bytes = max_bytes
+        self.min_compress_bytes = min_compress_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is not None:
+                self._entries.move_to_end(key)
+            return variants
+
+    def put(self, key, payload):
+        variants = self.encode(payload)
+        size = sum(len(body) for body in variants.values())
+        if size > self.max_bytes:
+            return variants
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= sum(len(body) for body in previous.values())
+            self._entries[key] = variants
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= sum(len(body) for body in evicted.values())
+        return variants
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def encode(self, payload):
+        # Same serialization settings as FastAPI's JSONResponse
+        body = json.dumps(
+            jsonable_encoder(payload),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+        variants = {"identity": body}
+        if len(body) >= self.min_compress_bytes:
+            variants["gzip"] = gzip.compress(body, compresslevel=9)
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=CATALOG_CACHE_BROTLI_QUALITY)
+        return variants
+
+
+response_cache = CompressedResponseCache(CATALOG_CACHE_MAX_BYTES, CATALOG_CACHE_MIN_COMPRESS_BYTES)
+
+
+def negotiate_encoding(accept_encoding, available):
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    best, best_q = "identity", 0.0
+    for coding in ENCODING_PREFERENCE:
+        if coding not in available or coding == "identity":
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+# Striped locks so that concurrent misses on one key wait for a single build instead of all rebuilding
+_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def build_lock(key):
+    return _build_locks[hash(key) % len(_build_locks)]
+
+
+def catalog_response(request: Request, key, build):
+    """Serve a catalog payload from the cache, building it once per catalog version."""
+    # Read the version before building so a concurrent write can never be cached under a newer version
+    cache_key = (key, get_catalog_version())
+    variants = response_cache.get(cache_key)
+    if variants is None:
+        with build_lock(cache_key):
+            variants = response_cache.get(cache_key)
+            if variants is None:
+                variants = response_cache.put(cache_key, build())
+    return encoded_response(request, variants)
+
+
+def encoded_response(request: Request, variants, headers=None):
+    """Send the stored variant that best matches the client's Accept-Encoding."""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), variants)
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,86 @@
+from app.catalog_cache import build_lock, response_cache
+from app.database import SessionLocal
+from app.models.career_model import CareerPath
+from app.models.insights_model import Insight
+from app.models.program_model import Program
+from app.models.university_model import University
+from app.models.university_program_model import UniversityProgram
+from app.models.catalog_snapshot_model import CatalogSnapshot
+
+MIN_SCORE_KEYS = ("min_score_science", "min_score_maths", "min_score_literature", "min_score_economics", "min_score_info")
+
+# Frozen years never change, so clients may keep their responses for good
+IMMUTABLE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+class YearCatalog:
+    """Read-optimized, immutable catalog of one past academic year, with its response bodies pre-encoded."""
+
+    def __init__(self, academic_year, data):
+        self.academic_year = academic_year
+        universities = data.get(University.__tablename__, [])
+        programs = data.get(Program.__tablename__, [])
+        career_paths = {row["id"]: row for row in data.get(CareerPath.__tablename__, [])}
+        university_names = {row["id"]: row["name"] for row in universities}
+        program_names = {row["program_id"]: row["program_name"] for row in programs}
+
+        self.cutoffs = {}
+        cutoff_rows = []
+        for row in data.get(UniversityProgram.__tablename__, []):
+            scores = {key: row.get(key) for key in MIN_SCORE_KEYS}
+            self.cutoffs[(row["university_id"], row["program_id"])] = scores
+            cutoff_rows.append({
+                "university_id": row["university_id"],
+                "university_name": university_names.get(row["university_id"]),
+                "program_id": row["program_id"],
+                "program_name": program_names.get(row["program_id"]),
+                **scores,
+            })
+
+        insights = [
+            {
+                "career_path_id": row["career_path_id"],
+                "career_path_name": career_paths.get(row["career_path_id"], {}).get("specific_career_path"),
+                "employability_rate": row["employability_rate"],
+                "average_salary": row["average_salary"],
+            }
+            for row in data.get(Insight.__tablename__, [])
+        ]
+
+        payloads = {
+            "universities": universities,
+            "programs": programs,
+            "cutoffs": cutoff_rows,
+            "insights": insights,
+        }
+        self.bodies = {
+            name: response_cache.encode({"academic_year": academic_year, name: rows})
+            for name, rows in payloads.items()
+        }
+
+
+_year_catalogs = {}
+
+
+def get_year_catalog(academic_year):
+    """Frozen catalog of `academic_year`, loaded from the database once and then served from memory."""
+    year_catalog = _year_catalogs.get(academic_year)
+    if year_catalog is not None:
+        return year_catalog
+
+    # Per-year lock, encoding one year's bodies must not hold up requests for the other years
+    with build_lock(("catalog_year", academic_year)):
+        if academic_year not in _year_catalogs:
+            db = SessionLocal()
+            try:
+                snapshot = db.get(CatalogSnapshot, academic_year)
+                if snapshot is None:
+                    return None
+                _year_catalogs[academic_year] = YearCatalog(academic_year, snapshot.data)
+            finally:
+                db.close()
+        return _year_catalogs[academic_year]
+
+
+def frozen_years(db):
+    return [year for (year,) in db.query(CatalogSnapshot.academic_year).order_by(CatalogSnapshot.academic_year)]
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, literal, select
+from sqlalchemy.orm import Session
+
+from app.catalog_cache import CATALOG_MODELS
+from app.models.catalog_change_model import CatalogChange
+
+
+def row_key(obj):
+    return inspect(obj).mapper.primary_key_from_instance(obj)[0]
+
+
+def row_data(obj):
+    return {column.key: getattr(obj, column.key) for column in inspect(obj).mapper.column_attrs}
+
+
+# Record every flushed insert, update and delete of a catalog row in the same transaction
+@event.listens_for(Session, "after_flush")
+def _record_catalog_changes(session, flush_context):
+    changes = []
+    now = datetime.utcnow()
+    for operation, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if not isinstance(obj, CATALOG_MODELS):
+                continue
+            if operation == "update" and not session.is_modified(obj):
+                continue
+            changes.append({
+                "table_name": obj.__tablename__,
+                "row_key": row_key(obj),
+                "operation": operation,
+                "data": None if operation == "delete" else row_data(obj),
+                "changed_at": now,
+            })
+
+    if changes:
+        session.connection().execute(CatalogChange.__table__.insert(), changes)
+
+
+def ensure_baseline(db):
+    """Start an empty log with a baseline entry.
+
+    Rows that existed before the log are only ever sent in snapshots, the baseline gives the first
+    snapshot a sequence number clients can sync from. Run at startup, the insert only happens while
+    the log is empty, so workers starting together still write a single baseline.
+    """
+    baseline = select(
+        literal("*"), literal(0), literal("baseline"), literal(datetime.utcnow())
+    ).where(~select(CatalogChange.seq).exists())
+    db.execute(
+        CatalogChange.__table__.insert().from_select(["table_name", "row_key", "operation", "changed_at"], baseline)
+    )
+    db.commit()
+
+
+def latest_seq(db):
+    return db.query(func.max(CatalogChange.seq)).scalar() or 0
+
+
+def oldest_seq(db):
+    return db.query(func.min(CatalogChange.seq)).scalar()
+
+
+def compacted_changes(db, since, until):
+    """Latest state of every row changed in (since, until], grouped by table."""
+    latest = {}
+    changes = (
+        db.query(CatalogChange)
+        .filter(CatalogChange.seq > since, CatalogChange.seq <= until, CatalogChange.operation != "baseline")
+        .order_by(CatalogChange.seq)
+    )
+    for change in changes:
+        latest[(change.table_name, change.row_key)] = change
+
+    tables = {model.__tablename__: {"upserts": [], "deletes": []} for model in CATALOG_MODELS}
+    for (table_name, key), change in latest.items():
+        if change.operation == "delete":
+            tables[table_name]["deletes"].append(key)
+        else:
+            tables[table_name]["upserts"].append(change.data)
+    return tables
+
+
+def catalog_snapshot(db):
+    return {
+        model.__tablename__: [row_data(obj) for obj in db.query(model).all()]
+        for model in CATALOG_MODELS
+    }
+
+
+def truncate_change_log(db, keep):
+    """Delete all but the newest `keep` entries. The newest entry is always kept so the sequence stays known."""
+    cutoff = latest_seq(db) - max(keep, 1)
+    deleted = db.query(CatalogChange).filter(CatalogChange.seq <= cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
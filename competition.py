@@ -0,0 +1,188 @@
+import threading
+import time
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import COMPETITION_INDEX_MAX_AGE_SECONDS
+from app.models.program_model import Program
+from app.models.university_model import University
+from app.models.university_program_model import UniversityProgram
+from app.models.user_model import User
+
+SECTIONS = ("science", "maths", "literature", "economics", "info")
+
+
+def normalize_section(section):
+    if section is None:
+        return None
+    section = section.strip().lower()
+    return section if section in SECTIONS else None
+
+
+class CompetitionIndex:
+    """Sorted baccalaureate scores per section and the eligible-applicant count of every program cutoff.
+
+    Counts come from one vectorized searchsorted per section over all cutoffs. Registrations and score
+    changes committed through this process are applied incrementally to both the scores and the counts.
+    Every load bumps `generation`, so changes flushed before a load that may already contain them are
+    not applied twice.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._scores = None
+        self._loaded_at = 0.0
+        self._table = None
+        self.generation = 0
+
+    def _load_scores(self, db):
+        grouped = {section: [] for section in SECTIONS}
+        rows = db.query(User.baccalaureate_section, User.baccalaureate_score).filter(
+            User.baccalaureate_section.isnot(None),
+            User.baccalaureate_score.isnot(None),
+        )
+        for section, score in rows:
+            section = normalize_section(section)
+            if section is not None:
+                grouped[section].append(score)
+
+        self._scores = {section: np.sort(np.asarray(scores, dtype=np.float64)) for section, scores in grouped.items()}
+        self._loaded_at = time.monotonic()
+        self._table = None
+        self.generation += 1
+
+    def _load_table(self, db, catalog_version):
+        links = (
+            db.query(
+                UniversityProgram.id,
+                UniversityProgram.university_id,
+                University.name.label("university_name"),
+                UniversityProgram.program_id,
+                Program.program_name,
+                *(getattr(UniversityProgram, f"min_score_{section}") for section in SECTIONS),
+            )
+            .join(University, UniversityProgram.university_id == University.id)
+            .join(Program, UniversityProgram.program_id == Program.program_id)
+            .all()
+        )
+
+        # A NULL cutoff (no minimum score) becomes NaN and admits every applicant of the section
+        cutoffs = {
+            section: np.array([getattr(link, f"min_score_{section}") for link in links], dtype=np.float64)
+            for section in SECTIONS
+        }
+        counts = {section: self._count(section, cutoffs[section]) for section in SECTIONS}
+        self._table = (catalog_version, links, cutoffs, counts)
+
+    def _count(self, section, cutoffs):
+        scores = self._scores[section]
+        counts = len(scores) - np.searchsorted(scores, cutoffs, side="left")
+        counts[np.isnan(cutoffs)] = len(scores)
+        return counts
+
+    def _admitted(self, section, score):
+        cutoffs = self._table[2][section]
+        return np.isnan(cutoffs) | (cutoffs <= score)
+
+    def apply(self, removed, added, generation):
+        """Apply committed (section, score) changes flushed while `generation` was loaded."""
+        with self._lock:
+            if self._scores is None:
+                return
+            if generation != self.generation:
+                # Reloaded since the flush, the load may or may not have seen the commit
+                self._scores = None
+                self._table = None
+                return
+
+            for section, score in removed:
+                scores = self._scores[section]
+                position = np.searchsorted(scores, score, side="left")
+                if position < len(scores) and scores[position] == score:
+                    self._scores[section] = np.delete(scores, position)
+                    if self._table is not None:
+                        self._table[3][section] -= self._admitted(section, score)
+
+            for section, score in added:
+                scores = self._scores[section]
+                position = np.searchsorted(scores, score, side="left")
+                self._scores[section] = np.insert(scores, position, score)
+                if self._table is not None:
+                    self._table[3][section] += self._admitted(section, score)
+
+    def eligible_applicant_counts(self, db, catalog_version):
+        """Return the program links, the eligible-applicant counts per section and the applicants per section."""
+        with self._lock:
+            if self._scores is None or time.monotonic() - self._loaded_at > self.max_age:
+                self._load_scores(db)
+            if self._table is None or self._table[0] != catalog_version:
+                self._load_table(db, catalog_version)
+
+            _, links, _, counts = self._table
+            totals = {section: len(scores) for section, scores in self._scores.items()}
+            return links, {section: counts[section].tolist() for section in SECTIONS}, totals
+
+
+competition_index = CompetitionIndex(COMPETITION_INDEX_MAX_AGE_SECONDS)
+
+
+def _score_entry(section, score):
+    section = normalize_section(section)
+    if section is None or score is None:
+        return None
+    return section, float(score)
+
+
+def _previous_value(state, key):
+    # Committed value before the flush, loaded before the overwrite thanks to active_history on User
+    history = state.attrs[key].history
+    if history.added or history.deleted:
+        return history.deleted[0] if history.deleted else None
+    return state.attrs[key].value
+
+
+# Collect score changes of users during the flush and apply them once the transaction commits
+@event.listens_for(Session, "after_flush")
+def _track_score_changes(session, flush_context):
+    removed, added = [], []
+    for user in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+
+        old = new = None
+        if user not in session.new:
+            old = _score_entry(
+                _previous_value(state, "baccalaureate_section"),
+                _previous_value(state, "baccalaureate_score"),
+            )
+        if user not in session.deleted:
+            new = _score_entry(user.baccalaureate_section, user.baccalaureate_score)
+
+        if old == new:
+            continue
+        if old is not None:
+            removed.append(old)
+        if new is not None:
+            added.append(new)
+
+    if removed or added:
+        deltas = session.info.setdefault("competition_deltas", ([], [], competition_index.generation))
+        deltas[0].extend(removed)
+        deltas[1].extend(added)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session):
+    deltas = session.info.pop("competition_deltas", None)
+    if deltas is not None:
+        competition_index.apply(*deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("competition_deltas", None)
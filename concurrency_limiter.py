@@ -0,0 +1,191 @@
+import re
+import time
+
+from fastapi.responses import JSONResponse
+
+from app.config import CONCURRENCY_RETRY_AFTER_SECONDS, WRITE_BATCHING_ENABLED, WRITE_BATCH_MAX_SIZE
+
+
+class AIMDLimit:
+    """Concurrency limit of one route class, adapted from how its latency compares to its usual latency.
+
+    Each class keeps a short-term and a long-term moving average of its response times. Responses run
+    slow when the short-term average exceeds `tolerance` times the long-term one, so every class is judged
+    against its own normal cost rather than a fixed target, and `min_slow_ms` keeps jitter on cheap routes
+    from counting. Slow or failed responses cut the limit by `backoff` (multiplicative decrease), at most
+    once per `window_ms` since a burst of slow responses is one overload signal. Fast responses grow the
+    limit by one per limit-worth (additive increase), always below `initial` and past it only while in use.
+    """
+
+    SHORT_WEIGHT = 0.1
+    LONG_WEIGHT = 0.01
+
+    def __init__(
+        self, name, priority, initial, min_limit, max_limit, min_slow_ms,
+        tolerance=2.0, cascade=True, window_ms=1000, backoff=0.9,
+    ):
+        self.name = name
+        self.priority = priority
+        self.initial = initial
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_slow = min_slow_ms / 1000
+        self.tolerance = tolerance
+        self.cascade = cascade
+        self.window = window_ms / 1000
+        self.backoff = backoff
+        self.short_latency = None
+        self.long_latency = None
+        self.last_decrease_at = None
+        self.inflight = 0
+        self.shed = 0
+
+    def try_acquire(self):
+        if self.inflight >= int(self.limit):
+            self.shed += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self):
+        self.inflight -= 1
+
+    def on_sample(self, latency, failed, now):
+        """Adapt the limit to one response, returns True when this cut the limit."""
+        if self.short_latency is None:
+            self.short_latency = self.long_latency = latency
+        self.short_latency += self.SHORT_WEIGHT * (latency - self.short_latency)
+        slow = self.short_latency > max(self.tolerance * self.long_latency, self.min_slow)
+        # The usual latency only creeps up while the class runs slow, so an overload is not learned as normal
+        long_weight = self.LONG_WEIGHT / 10 if slow else self.LONG_WEIGHT
+        self.long_latency += long_weight * (latency - self.long_latency)
+
+        if failed or slow:
+            return self.decrease(now)
+
+        # Below the initial limit the class recovers from earlier cuts even under light load, past it the
+        # limit only grows while it is actually in use, otherwise it would drift up while idle
+        if self.inflight + 1 >= self.limit / 2:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif self.limit < self.initial:
+            self.limit = min(self.initial, self.limit + 1 / self.limit)
+        return False
+
+    def decrease(self, now):
+        if self.last_decrease_at is not None and now - self.last_decrease_at < self.window:
+            return False
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.last_decrease_at = now
+        return True
+
+
+# Lower priority numbers are more important. Requests that match no rule use the "standard" class.
+# Classes with cascade=False do not make the less important classes back off when they cut their own limit.
+DEFAULT_ROUTE_CLASSES = {
+    "critical": dict(priority=0, initial=64, min_limit=16, max_limit=256, min_slow_ms=20),
+    "standard": dict(priority=1, initial=32, min_limit=4, max_limit=128, min_slow_ms=50),
+    "expensive": dict(priority=2, initial=8, min_limit=1, max_limit=64, min_slow_ms=100),
+    # bcrypt costs about 0.35 s per request, which is this class's normal pace and says nothing about
+    # the load of the other classes
+    "password_hashing": dict(priority=2, initial=8, min_limit=2, max_limit=32, min_slow_ms=1000, cascade=False),
+    # Writes grouped by the write batcher wait for their batch, the class must let whole batches through
+    "batched_writes": dict(
+        priority=1,
+        initial=4 * WRITE_BATCH_MAX_SIZE,
+        min_limit=WRITE_BATCH_MAX_SIZE,
+        max_limit=16 * WRITE_BATCH_MAX_SIZE,
+        min_slow_ms=1000,
+        cascade=False,
+    ),
+}
+
+DEFAULT_ROUTE_RULES = [
+    # Cheap lookups by id that must stay fast on results day
+    ("GET", r"^/universities/\d+$", "critical"),
+    ("GET", r"^/programs/\d+$", "critical"),
+    ("GET", r"^/insights/\d+$", "critical"),
+    ("GET", r"^/university-programs/eligibility$", "critical"),
+    ("GET", r"^/catalog/years/\d+/\w+$", "critical"),
+    # Large scans and joins
+    ("GET", r"^/users/user/university_programs$", "expensive"),
+    ("GET", r"^/users/users$", "expensive"),
+    ("GET", r"^/university-programs/?$", "expensive"),
+    ("GET", r"^/university-programs/search$", "expensive"),
+    ("GET", r"^/insights/competition$", "expensive"),
+    ("GET", r"^/catalog/changes$", "expensive"),
+    # Password hashing
+    ("POST", r"^/auth/login$", "password_hashing"),
+    ("POST", r"^/auth/signup$", "password_hashing"),
+    ("PUT", r"^/auth/reset-password/[^/]+$", "password_hashing"),
+]
+
+if WRITE_BATCHING_ENABLED:
+    # Ahead of the other rules, the first matching rule wins
+    DEFAULT_ROUTE_RULES = [
+        ("POST", r"^/auth/signup$", "batched_writes"),
+        ("PUT", r"^/auth/reset-password/[^/]+$", "batched_writes"),
+        ("PUT", r"^/users/user/preferences$", "batched_writes"),
+    ] + DEFAULT_ROUTE_RULES
+
+
+class AdaptiveConcurrencyMiddleware:
+    """ASGI middleware keeping an adaptive concurrency limit per route class.
+
+    Requests over their class limit are rejected right away with 503 and Retry-After instead of
+    queuing. When a cascading class cuts its limit, every less important class backs off too (each at
+    most once per its own window), so the expensive routes give way to the cheap critical ones.
+    """
+
+    def __init__(self, app, route_classes=None, route_rules=None, retry_after=CONCURRENCY_RETRY_AFTER_SECONDS):
+        self.app = app
+        self.retry_after = retry_after
+        self.limits = {
+            name: AIMDLimit(name, **settings)
+            for name, settings in (route_classes or DEFAULT_ROUTE_CLASSES).items()
+        }
+        self.rules = [
+            (method, re.compile(pattern), self.limits[name])
+            for method, pattern, name in (route_rules or DEFAULT_ROUTE_RULES)
+        ]
+        self.default_limit = self.limits["standard"]
+
+    def classify(self, method, path):
+        for rule_method, pattern, limit in self.rules:
+            if rule_method == method and pattern.match(path):
+                return limit
+        return self.default_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.classify(scope["method"], scope["path"])
+        if not limit.try_acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please retry later."},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limit.release()
+            now = time.monotonic()
+            if limit.on_sample(now - started, status_code >= 500, now) and limit.cascade:
+                for other in self.limits.values():
+                    if other.priority > limit.priority:
+                        other.decrease(now)
@@ -0,0 +1,33 @@
+import os
+
+# Catalog response cache - serialized catalog bodies kept with their gzip/brotli variants
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+CATALOG_CACHE_MIN_COMPRESS_BYTES = int(os.getenv("CATALOG_CACHE_MIN_COMPRESS_BYTES", 1024))
+# Bodies are compressed while a request waits on them, brotli's top levels cost seconds on a large catalog
+CATALOG_CACHE_BROTLI_QUALITY = int(os.getenv("CATALOG_CACHE_BROTLI_QUALITY", 5))
+# The catalog version is re-read from the database at most this often, so writes committed by other
+# worker processes invalidate this worker's cached bodies and indexes too
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", 1))
+
+# Competition analytics - the in-memory score index is rebuilt from the users table after this many seconds,
+# so writes committed by other worker processes are picked up
+COMPETITION_INDEX_MAX_AGE_SECONDS = float(os.getenv("COMPETITION_INDEX_MAX_AGE_SECONDS", 300))
+
+# Group commit - small user writes arriving within the wait window share one transaction
+WRITE_BATCHING_ENABLED = os.getenv("WRITE_BATCHING_ENABLED", "0") == "1"
+WRITE_BATCH_MAX_WAIT_MS = float(os.getenv("WRITE_BATCH_MAX_WAIT_MS", 5))
+WRITE_BATCH_MAX_SIZE = int(os.getenv("WRITE_BATCH_MAX_SIZE", 64))
+
+# Batch fetch endpoints - most ids accepted in a single request
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", 100))
+
+# Catalog change log - entries kept when the log is truncated, older clients fall back to a full snapshot
+CATALOG_CHANGE_LOG_RETENTION = int(os.getenv("CATALOG_CHANGE_LOG_RETENTION", 50000))
+
+# Academic years - the current year is served from the live tables, past years from frozen snapshots.
+# Rollover order: raise CURRENT_ACADEMIC_YEAR, freeze the previous year, and only then edit the new year's cutoffs.
+CURRENT_ACADEMIC_YEAR = int(os.getenv("CURRENT_ACADEMIC_YEAR", 2026))
+
+# Adaptive concurrency limits - requests over the limit of their route class get a 503 with Retry-After
+CONCURRENCY_LIMITER_ENABLED = os.getenv("CONCURRENCY_LIMITER_ENABLED", "1") == "1"
+CONCURRENCY_RETRY_AFTER_SECONDS = int(os.getenv("CONCURRENCY_RETRY_AFTER_SECONDS", 2))
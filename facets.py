@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+
+from app.competition import SECTIONS
+from app.models.program_model import Program
+from app.models.university_model import University
+from app.models.university_program_model import UniversityProgram
+
+# Facet name -> labelled column of the university-program listing it is read from
+FACETS = {
+    "location": University.location.label("location"),
+    "university_type": University.type.label("university_type"),
+    "program_type": Program.program_type.label("program_type"),
+}
+
+# Number of set bits in every byte value, used to count packed bitmaps
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def popcount(bitmap):
+    return int(_POPCOUNT[bitmap].sum())
+
+
+class FacetIndex:
+    """Packed bitmaps over the university-program links, one per facet value, built for one catalog version."""
+
+    def __init__(self, db, catalog_version):
+        self.catalog_version = catalog_version
+        self.rows = (
+            db.query(
+                UniversityProgram.id,
+                UniversityProgram.university_id,
+                University.name.label("university_name"),
+                UniversityProgram.program_id,
+                Program.program_name,
+                *FACETS.values(),
+                *(getattr(UniversityProgram, f"min_score_{section}") for section in SECTIONS),
+            )
+            .join(University, UniversityProgram.university_id == University.id)
+            .join(Program, UniversityProgram.program_id == Program.program_id)
+            .order_by(UniversityProgram.id)
+            .all()
+        )
+        size = len(self.rows)
+        self.all = np.packbits(np.ones(size, dtype=bool))
+
+        # Links whose facet value is NULL are only reachable without a filter on that facet
+        self.bitmaps = {}
+        for facet in FACETS:
+            positions = {}
+            for position, row in enumerate(self.rows):
+                value = getattr(row, facet)
+                if value is not None:
+                    positions.setdefault(value, []).append(position)
+            self.bitmaps[facet] = {value: self._bitmap(found) for value, found in positions.items()}
+
+        # Cutoffs stay as arrays since the score threshold is only known at query time
+        self.cutoffs = {
+            section: np.array([getattr(row, f"min_score_{section}") for row in self.rows], dtype=np.float64)
+            for section in SECTIONS
+        }
+
+    def _bitmap(self, positions):
+        mask = np.zeros(len(self.rows), dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def eligible(self, section, score):
+        cutoffs = self.cutoffs[section]
+        return np.packbits(np.isnan(cutoffs) | (cutoffs <= score))
+
+    def facet_filter(self, facet, values):
+        bitmap = np.zeros_like(self.all)
+        for value in values:
+            found = self.bitmaps[facet].get(value)
+            if found is not None:
+                bitmap |= found
+        return bitmap
+
+    def search(self, filters, eligibility=None, skip=0, limit=50):
+        """Return the matching page, the total number of matches and the counts per facet value.
+
+        `filters` maps a facet to the accepted values (OR within a facet, AND across facets). The counts of
+        a facet ignore that facet's own filter, so they tell how many links each alternative value would give.
+        """
+        selected = {facet: self.facet_filter(facet, values) for facet, values in filters.items() if values}
+        base = self.all if eligibility is None else eligibility
+
+        match = base.copy()
+        for bitmap in selected.values():
+            match &= bitmap
+
+        facets = {}
+        for facet in FACETS:
+            others = base.copy()
+            for other, bitmap in selected.items():
+                if other != facet:
+                    others &= bitmap
+            counts = [
+                {"value": value, "count": popcount(others & bitmap)}
+                for value, bitmap in self.bitmaps[facet].items()
+            ]
+            facets[facet] = sorted(
+                (count for count in counts if count["count"]),
+                key=lambda count: (-count["count"], str(count["value"])),
+            )
+
+        positions = np.flatnonzero(np.unpackbits(match, count=len(self.rows)))
+        page = [self.rows[position] for position in positions[skip:skip + limit]]
+        return page, len(positions), facets
+
+
+_index_lock = threading.Lock()
+_facet_index = None
+
+
+def get_facet_index(db, catalog_version):
+    global _facet_index
+    with _index_lock:
+        if _facet_index is None or _facet_index.catalog_version != catalog_version:
+            _facet_index = FacetIndex(db, catalog_version)
+        return _facet_index
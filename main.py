@@ -1,7 +1,20 @@
 from fastapi import FastAPI
-from app.database import Base, engine
-from app.models import user_model, career_model, program_model, university_model, university_program_model  # Import the models
-from app.routes import user, auth, universities, programs, insights, university_program
+from app.database import Base, engine, SessionLocal
+from app.models import user_model, career_model, program_model, university_model, university_program_model, catalog_change_model, catalog_snapshot_model  # Import the models
+from app.routes import user, auth, universities, programs, insights, university_program, catalog
+from app.config import CONCURRENCY_LIMITER_ENABLED
+from app.concurrency_limiter import AdaptiveConcurrencyMiddleware
+from app.change_log import ensure_baseline
+
+# Create the tables added after the original schema, existing databases only have the original ones
+Base.metadata.create_all(
+    engine,
+    tables=[catalog_change_model.CatalogChange.__table__, catalog_snapshot_model.CatalogSnapshot.__table__],
+)
+
+# Give the catalog change log its baseline before any client syncs
+with SessionLocal() as db:
+    ensure_baseline(db)
 
 # Create the FastAPI app
 app = FastAPI(
@@ -10,6 +23,10 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Shed excess requests per route class before they pile up in the workers
+if CONCURRENCY_LIMITER_ENABLED:
+    app.add_middleware(AdaptiveConcurrencyMiddleware)
+
 
 # Include your routers
 app.include_router(user.router, prefix="/users", tags=["Users"])
@@ -17,4 +34,5 @@ app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(universities.router, prefix="/universities", tags=["Universities"])
 app.include_router(programs.router, prefix="/programs", tags=["Programs"])
 app.include_router(insights.router, prefix="/insights", tags=["Insights"])
-app.include_router(university_program.router, prefix="/university-programs", tags=["University Programs"])
\ No newline at end of file
+app.include_router(university_program.router, prefix="/university-programs", tags=["University Programs"])
+app.include_router(catalog.router, prefix="/catalog", tags=["Catalog"])
\ No newline at end of file
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.database import Base
+
+class CatalogChange(Base):
+    __tablename__ = "catalog_changes"
+    # AUTOINCREMENT so sequence numbers are never reused after the log is truncated
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(50), nullable=False, index=True)
+    row_key = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # "insert", "update" or "delete"
+    data = Column(JSON, nullable=True)  # Row state after the change, NULL for deletes
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, JSON
+from app.database import Base
+
+class CatalogSnapshot(Base):
+    __tablename__ = "catalog_snapshots"
+
+    # Academic year the catalog was frozen for, e.g. 2025 for 2025-2026
+    academic_year = Column(Integer, primary_key=True)
+    frozen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    data = Column(JSON, nullable=False)  # Catalog rows by table name, never updated once written
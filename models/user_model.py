@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from app.database import Base
 
 class User(Base):
@@ -7,8 +7,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, nullable=False)
     password = Column(String(255), nullable=False)
-    baccalaureate_score = Column(Float, nullable=True)
-    baccalaureate_section = Column(String, nullable=True)
+    # active_history loads the committed value before it is overwritten, the competition index needs it
+    baccalaureate_score = column_property(Column(Float, nullable=True), active_history=True)
+    baccalaureate_section = column_property(Column(String, nullable=True), active_history=True)
     career_path_id = Column(Integer, ForeignKey("careerpaths.id"), nullable=True)
 
     career_path = relationship("CareerPath", back_populates="users")
\ No newline at end of file
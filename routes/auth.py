@@ -4,10 +4,12 @@ import jwt
 from passlib.context import CryptContext
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.user_model import User as UserModel
+from app.write_batcher import run_write
 
 # Create FastAPI router
 router = APIRouter()
@@ -87,21 +89,30 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 # POST /auth/signup - Register a new user
 @router.post("/signup", response_model=User)
 def signup(user: User, password: str, db: Session = Depends(get_db)):
-    db_user = get_user(db, user.username)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered",
-        )
-    hashed_password = get_password_hash(password)
-    user_in_db = UserModel(
-        username=user.username,
-        password=hashed_password,
+    already_registered = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Username already registered",
     )
-    db.add(user_in_db)
-    db.commit()
-    db.refresh(user_in_db)
-    return user_in_db
+    if get_user(db, user.username):
+        raise already_registered
+
+    # Hash outside the write so the (possibly batched) transaction stays short
+    hashed_password = get_password_hash(password)
+
+    def create_user(session: Session):
+        if get_user(session, user.username):
+            raise already_registered
+        user_in_db = UserModel(
+            username=user.username,
+            password=hashed_password,
+        )
+        session.add(user_in_db)
+        return {"username": user_in_db.username}
+
+    try:
+        return run_write(db, create_user)
+    except IntegrityError:
+        raise already_registered
 
 # POST /auth/login - Login and receive a token
 @router.post("/login", response_model=Token)
@@ -121,13 +132,20 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 @router.put("/reset-password/{username}")
 def reset_password(username: str, new_password: str, db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    if not user:
+    # Check the user before hashing, unknown usernames should not cost a bcrypt round
+    if not get_user(db, username):
         raise HTTPException(status_code=404, detail="User  not found.")
 
     # Hash the new password
     hashed_password = get_password_hash(new_password)
-    user.password = hashed_password
-    db.commit()
+
+    def update_password(session: Session):
+        # Checked again, the user may have been deleted while the password was hashed
+        user = session.query(UserModel).filter(UserModel.username == username).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User  not found.")
+        user.password = hashed_password
+
+    run_write(db, update_password)
 
     return {"message": "Password reset successfully."}
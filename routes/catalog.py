@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.config import CATALOG_CHANGE_LOG_RETENTION, CURRENT_ACADEMIC_YEAR
+from app.catalog_cache import encoded_response
+from app.catalog_snapshots import IMMUTABLE_HEADERS, MIN_SCORE_KEYS, get_year_catalog, frozen_years
+from app.change_log import latest_seq, oldest_seq, compacted_changes, catalog_snapshot, truncate_change_log
+from app.models.catalog_snapshot_model import CatalogSnapshot
+from app.models.university_program_model import UniversityProgram
+
+router = APIRouter()
+
+# GET /catalog/changes - Rows of the catalog changed since a sequence number, compacted to their latest state
+@router.get("/changes")
+def get_catalog_changes(since: int = Query(0, ge=0), db: Session = Depends(get_db)):
+    # Read the sequence first, rows changed meanwhile are sent again on the next sync
+    seq = latest_seq(db)
+    oldest = oldest_seq(db)
+
+    # A new client (rows older than the log are only in snapshots), a client behind the truncated log,
+    # or one ahead of it (e.g. after a database reset)
+    log_truncated = oldest is not None and since < oldest - 1
+    if since == 0 or log_truncated or since > seq:
+        return {
+            "since": since,
+            "seq": seq,
+            "snapshot": True,
+            "tables": catalog_snapshot(db),
+        }
+
+    return {
+        "since": since,
+        "seq": seq,
+        "snapshot": False,
+        "tables": compacted_changes(db, since, seq),
+    }
+
+# DELETE /catalog/changes - Truncate the change log, keeping the newest entries
+@router.delete("/changes")
+def delete_old_catalog_changes(
+    keep: int = Query(CATALOG_CHANGE_LOG_RETENTION, ge=1),
+    db: Session = Depends(get_db),
+):
+    deleted = truncate_change_log(db, keep)
+    return {"message": "Catalog change log truncated.", "deleted": deleted, "seq": latest_seq(db)}
+
+# GET /catalog/years - List the frozen academic years and the current (writable) one
+@router.get("/years")
+def get_academic_years(db: Session = Depends(get_db)):
+    return {"current_academic_year": CURRENT_ACADEMIC_YEAR, "frozen_academic_years": frozen_years(db)}
+
+# POST /catalog/years/{academic_year}/freeze - Freeze the live catalog as the immutable catalog of the year just rolled over from.
+# The live tables only hold that year's values until the new year's cutoffs are edited, so freeze right after
+# raising CURRENT_ACADEMIC_YEAR and before editing any cutoff.
+@router.post("/years/{academic_year}/freeze")
+def freeze_academic_year(academic_year: int, db: Session = Depends(get_db)):
+    if academic_year != CURRENT_ACADEMIC_YEAR - 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only academic year {CURRENT_ACADEMIC_YEAR - 1}, the year just rolled over from, can be frozen.",
+        )
+    if db.get(CatalogSnapshot, academic_year) is not None:
+        raise HTTPException(status_code=409, detail=f"Academic year {academic_year} is already frozen.")
+
+    db.add(CatalogSnapshot(academic_year=academic_year, data=catalog_snapshot(db)))
+    try:
+        db.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail=f"Academic year {academic_year} is already frozen.")
+
+    return {"message": "Academic year frozen successfully.", "academic_year": academic_year}
+
+def frozen_catalog_response(request: Request, academic_year: int, collection: str):
+    year_catalog = get_year_catalog(academic_year)
+    if year_catalog is None:
+        raise HTTPException(status_code=404, detail=f"No frozen catalog for academic year {academic_year}.")
+    return encoded_response(request, year_catalog.bodies[collection], IMMUTABLE_HEADERS)
+
+# GET /catalog/years/{academic_year}/universities - Universities of a frozen academic year
+@router.get("/years/{academic_year}/universities")
+def get_year_universities(academic_year: int, request: Request):
+    return frozen_catalog_response(request, academic_year, "universities")
+
+# GET /catalog/years/{academic_year}/programs - Programs of a frozen academic year
+@router.get("/years/{academic_year}/programs")
+def get_year_programs(academic_year: int, request: Request):
+    return frozen_catalog_response(request, academic_year, "programs")
+
+# GET /catalog/years/{academic_year}/cutoffs - Minimum scores of every university program in a frozen academic year
+@router.get("/years/{academic_year}/cutoffs")
+def get_year_cutoffs(academic_year: int, request: Request):
+    return frozen_catalog_response(request, academic_year, "cutoffs")
+
+# GET /catalog/years/{academic_year}/insights - Employability and salary insights of a frozen academic year
+@router.get("/years/{academic_year}/insights")
+def get_year_insights(academic_year: int, request: Request):
+    return frozen_catalog_response(request, academic_year, "insights")
+
+# GET /catalog/cutoffs/trend - Minimum scores of a university program across the frozen years and the current one
+@router.get("/cutoffs/trend")
+def get_cutoff_trend(university_id: int, program_id: int, db: Session = Depends(get_db)):
+    trend = []
+    for academic_year in frozen_years(db):
+        scores = get_year_catalog(academic_year).cutoffs.get((university_id, program_id))
+        if scores is not None:
+            trend.append({"academic_year": academic_year, **scores})
+
+    current = db.query(UniversityProgram).filter(
+        UniversityProgram.university_id == university_id,
+        UniversityProgram.program_id == program_id,
+    ).first()
+    if current is not None:
+        trend.append({
+            "academic_year": CURRENT_ACADEMIC_YEAR,
+            **{key: getattr(current, key) for key in MIN_SCORE_KEYS},
+        })
+
+    if not trend:
+        raise HTTPException(status_code=404, detail="Program not offered by this university in any academic year.")
+
+    return {"university_id": university_id, "program_id": program_id, "trend": trend}
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.catalog_cache import catalog_response, get_catalog_version
+from app.competition import SECTIONS, competition_index, normalize_section
+from app.batch_fetch import unique_ids, fetch_career_paths, fetch_insights
 from app.models.insights_model import Insight
 from app.models.career_model import CareerPath
 
@@ -8,20 +12,23 @@ router = APIRouter()
 
 # GET /insights/employability - Get employability rates by career field
 @router.get("/employability")
-def get_employability_rates(db: Session = Depends(get_db)):
-    insights = db.query(Insight).all()
-    if not insights:
-        raise HTTPException(status_code=404, detail="No employability data found")
+def get_employability_rates(request: Request, db: Session = Depends(get_db)):
+    def build():
+        insights = db.query(Insight).all()
+        if not insights:
+            raise HTTPException(status_code=404, detail="No employability data found")
 
-    employability_rates = [
-        {
-            "career_path_id": insight.career_path_id,
-            "career_path": db.query(CareerPath).filter(CareerPath.id == insight.career_path_id).first().specific_career_path,
-            "employability_rate": insight.employability_rate,
-        }
-        for insight in insights
-    ]
-    return {"employability_rates": employability_rates}
+        employability_rates = [
+            {
+                "career_path_id": insight.career_path_id,
+                "career_path": db.query(CareerPath).filter(CareerPath.id == insight.career_path_id).first().specific_career_path,
+                "employability_rate": insight.employability_rate,
+            }
+            for insight in insights
+        ]
+        return {"employability_rates": employability_rates}
+
+    return catalog_response(request, "employability_rates", build)
 
 # GET /insights/salaries - Get average salaries by career field
 @router.get("/salaries")
@@ -40,6 +47,60 @@ def get_average_salaries(db: Session = Depends(get_db)):
     ]
     return {"average_salaries": average_salaries}
 
+# GET /insights/competition - Number of registered students of each section who clear each program cutoff
+@router.get("/competition")
+def get_program_competition(section: Optional[str] = None, db: Session = Depends(get_db)):
+    # Same normalization as the index, so "Science" and "science" name the same section
+    normalized = normalize_section(section)
+    if section is not None and normalized is None:
+        raise HTTPException(status_code=400, detail="Invalid baccalaureate section")
+    sections = [normalized] if normalized else list(SECTIONS)
+
+    links, counts, totals = competition_index.eligible_applicant_counts(db, get_catalog_version())
+    if not links:
+        raise HTTPException(status_code=404, detail="No university-programs found")
+
+    programs = [
+        {
+            "university_id": link.university_id,
+            "university_name": link.university_name,
+            "program_id": link.program_id,
+            "program_name": link.program_name,
+            "min_scores": {s: getattr(link, f"min_score_{s}") for s in sections},
+            "eligible_applicants": {s: counts[s][i] for s in sections},
+        }
+        for i, link in enumerate(links)
+    ]
+    return {
+        "registered_applicants": {s: totals[s] for s in sections},
+        "programs": programs,
+    }
+
+# GET /insights/batch - Get employability and salary insights for several career paths
+@router.get("/batch")
+def get_insights_batch(career_path_ids: List[int] = Query(...), db: Session = Depends(get_db)):
+    career_path_ids = unique_ids(career_path_ids)
+    career_paths = fetch_career_paths(db, career_path_ids)
+    insights = fetch_insights(db, career_path_ids)
+
+    results = []
+    missing = []
+    for career_path_id in career_path_ids:
+        career_path = career_paths.get(career_path_id)
+        insight = insights.get(career_path_id)
+        if career_path is None or insight is None:
+            missing.append(career_path_id)
+            error = "Career path not found." if career_path is None else "No insights found for the specified career path."
+            results.append({"career_path_id": career_path_id, "error": error})
+            continue
+        results.append({
+            "career_path_id": career_path_id,
+            "career_path_name": career_path.specific_career_path,
+            **insight,
+        })
+
+    return {"insights": results, "missing": missing}
+
 # GET /insights/career-path/{career_path_id} - Get employability and salary insights for a career path
 @router.get("/{career_path_id}")
 def get_employability_and_salary(career_path_id: int, db: Session = Depends(get_db)):
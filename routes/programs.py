@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.models.program_model import Program
 from app.models.career_model import CareerPath
 from app.models.university_program_model import UniversityProgram
 from app.database import get_db
+from app.catalog_cache import catalog_response
+from app.sparse_fields import parse_fields, fieldset_key, rows_to_dicts
+from app.batch_fetch import unique_ids, fetch_cutoffs, fetch_insights
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the program list and detail endpoints
+PROGRAM_FIELDS = {
+    "program_id": Program.program_id,
+    "program_type": Program.program_type,
+    "program_name": Program.program_name,
+    "career_path_id": Program.career_path_id,
+}
+
 # POST /programs - Add a new program to the database
 @router.post("/programs")
 def create_program(
@@ -34,25 +46,74 @@ def create_program(
 
 # GET /programs - Retrieve all programs in the database
 @router.get("/programs")
-def get_programs(db: Session = Depends(get_db)):
-    programs = db.query(Program).all()
-    if not programs:
-        raise HTTPException(status_code=404, detail="No programs found")
-    return {"programs": programs}
+def get_programs(request: Request, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, PROGRAM_FIELDS)
+
+    def build():
+        if columns:
+            programs = rows_to_dicts(db.query(*columns).all())
+        else:
+            programs = db.query(Program).all()
+        if not programs:
+            raise HTTPException(status_code=404, detail="No programs found")
+        return {"programs": programs}
+
+    return catalog_response(request, ("programs", fieldset_key(columns)), build)
+
+# GET /programs/batch - Retrieve several programs with their university cutoffs and career path insight
+@router.get("/batch")
+def get_programs_batch(ids: List[int] = Query(...), db: Session = Depends(get_db)):
+    ids = unique_ids(ids)
+    programs = {program.program_id: program for program in db.query(Program).filter(Program.program_id.in_(ids))}
+    cutoffs = fetch_cutoffs(db, UniversityProgram.program_id, ids)
+    insights = fetch_insights(db, {program.career_path_id for program in programs.values()})
+
+    results = []
+    for program_id in ids:
+        program = programs.get(program_id)
+        if program is None:
+            results.append({"program_id": program_id, "error": "Program not found"})
+            continue
+        results.append({
+            "program_id": program_id,
+            "program": program,
+            "universities": cutoffs.get(program_id, []),
+            "insight": insights.get(program.career_path_id),
+        })
+
+    return {
+        "programs": results,
+        "missing": [program_id for program_id in ids if program_id not in programs],
+    }
 
 # GET /programs/{program_id} - Retrieve a specific program by ID
 @router.get("/{program_id}")
-def get_program_by_id(program_id: int, db: Session = Depends(get_db)):
-    program = db.query(Program).filter(Program.program_id == program_id).first()
+def get_program_by_id(program_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, PROGRAM_FIELDS)
+    if columns:
+        program = db.query(*columns).filter(Program.program_id == program_id).first()
+    else:
+        program = db.query(Program).filter(Program.program_id == program_id).first()
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
-    return {"program": program}
+    return {"program": program._asdict() if columns else program}
 
 # GET /programs/career-path/{career_path_id} - Retrieve programs based on a specific career path
 @router.get("/career-path/{career_path_id}")
-def get_programs_by_career_path(career_path_id: int, db: Session = Depends(get_db)):
-    
-    programs = db.query(Program).join(UniversityProgram).join(CareerPath).filter(CareerPath.id == career_path_id).all()
+def get_programs_by_career_path(career_path_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, PROGRAM_FIELDS)
+    if columns:
+        # Programs of the career path offered by at least one university, once each like the entity query below
+        programs = rows_to_dicts(
+            db.query(*columns)
+            .filter(
+                Program.career_path_id == career_path_id,
+                Program.program_id.in_(db.query(UniversityProgram.program_id)),
+            )
+            .all()
+        )
+    else:
+        programs = db.query(Program).join(UniversityProgram).join(CareerPath).filter(CareerPath.id == career_path_id).all()
     if not programs:
         raise HTTPException(status_code=404, detail="No programs found for this career path")
     return {"programs": programs}
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.catalog_cache import catalog_response
+from app.sparse_fields import parse_fields, fieldset_key, rows_to_dicts
+from app.batch_fetch import unique_ids, fetch_cutoffs
 from app.models.university_model import University as UniversityModel
 from app.schemas.university_schema import University, UniversityCreate, UniversityUpdate
 from app.models.university_program_model import UniversityProgram
@@ -9,17 +14,79 @@ from app.models.program_model import Program
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the university list and detail endpoints
+UNIVERSITY_FIELDS = {
+    "id": UniversityModel.id,
+    "name": UniversityModel.name,
+    "location": UniversityModel.location,
+    "type": UniversityModel.type,
+}
+
+# Fields selectable with ?fields= on the programs offered by one university
+UNIVERSITY_PROGRAMS_FIELDS = {
+    "program_id": Program.program_id,
+    "program_name": Program.program_name,
+    "min_score_science": UniversityProgram.min_score_science,
+    "min_score_maths": UniversityProgram.min_score_maths,
+    "min_score_literature": UniversityProgram.min_score_literature,
+    "min_score_economics": UniversityProgram.min_score_economics,
+    "min_score_info": UniversityProgram.min_score_info,
+}
+
 # GET /universities - Fetches a list of all universities
 @router.get("/")
-def get_all_universities(db: Session = Depends(get_db)):
-    universities = db.query(UniversityModel).all()  
-    if not universities:
-        raise HTTPException(status_code=404, detail="No universities found.")
-    return {"universities": universities}
+def get_all_universities(request: Request, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_FIELDS)
+
+    def build():
+        if columns:
+            universities = rows_to_dicts(db.query(*columns).all())
+        else:
+            universities = db.query(UniversityModel).all()
+        if not universities:
+            raise HTTPException(status_code=404, detail="No universities found.")
+        return {"universities": universities}
+
+    return catalog_response(request, ("universities", fieldset_key(columns)), build)
+
+# GET /universities/batch - Fetches several universities with the cutoffs of the programs they offer
+@router.get("/batch")
+def get_universities_batch(ids: List[int] = Query(...), db: Session = Depends(get_db)):
+    ids = unique_ids(ids)
+    universities = {
+        university.id: university
+        for university in db.query(UniversityModel).filter(UniversityModel.id.in_(ids))
+    }
+    cutoffs = fetch_cutoffs(db, UniversityProgram.university_id, ids)
+
+    results = []
+    for university_id in ids:
+        university = universities.get(university_id)
+        if university is None:
+            results.append({"university_id": university_id, "error": "University not found"})
+            continue
+        results.append({
+            "university_id": university_id,
+            "university": university,
+            "programs": cutoffs.get(university_id, []),
+        })
+
+    return {
+        "universities": results,
+        "missing": [university_id for university_id in ids if university_id not in universities],
+    }
 
 # GET /universities/{university_id}: Fetches a specific university by its id.
 @router.get("/{university_id}", response_model=University)
-def read_university(university_id: int, db: Session = Depends(get_db)):
+def read_university(university_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_FIELDS)
+    if columns:
+        # Partial rows do not fit the response model, so they are returned as they are
+        row = db.query(*columns).filter(UniversityModel.id == university_id).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="University not found")
+        return JSONResponse(content=row._asdict())
+
     db_university = db.query(UniversityModel).filter(UniversityModel.id == university_id).first()
     if db_university is None:
         raise HTTPException(status_code=404, detail="University not found")
@@ -48,8 +115,24 @@ def update_university(university_id: int, university: UniversityUpdate, db: Sess
 
 #GET /universities/{university_id}/programs - Retrieves all programs offered by a specific university using the UniversityProgram junction table.
 @router.get("/{university_id}/programs")
-def get_programs_by_university(university_id: int, db: Session = Depends(get_db)):
-    
+def get_programs_by_university(university_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_PROGRAMS_FIELDS)
+    if columns:
+        # One column-only join instead of a program lookup per link
+        programs = rows_to_dicts(
+            db.query(*columns)
+            .select_from(UniversityProgram)
+            .join(Program, UniversityProgram.program_id == Program.program_id)
+            .filter(UniversityProgram.university_id == university_id)
+            .all()
+        )
+        if not programs:
+            raise HTTPException(status_code=404, detail=f"No programs found for university ID {university_id}.")
+        university = db.query(UniversityModel.id, UniversityModel.name).filter(UniversityModel.id == university_id).first()
+        if not university:
+            raise HTTPException(status_code=404, detail=f"University with ID {university_id} not found.")
+        return {"university_id": university.id, "university_name": university.name, "programs": programs}
+
     university_programs = (
         db.query(UniversityProgram)
         .filter(UniversityProgram.university_id == university_id)
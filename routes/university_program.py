@@ -1,57 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.models.university_program_model import UniversityProgram
 from app.models.university_model import University
 from app.models.program_model import Program
 from app.database import get_db
+from app.catalog_cache import catalog_response, get_catalog_version
+from app.competition import normalize_section
+from app.facets import get_facet_index
+from app.sparse_fields import parse_fields, fieldset_key, rows_to_dicts
 
 router = APIRouter()
 
+MIN_SCORE_FIELDS = {
+    "min_score_science": UniversityProgram.min_score_science,
+    "min_score_maths": UniversityProgram.min_score_maths,
+    "min_score_literature": UniversityProgram.min_score_literature,
+    "min_score_economics": UniversityProgram.min_score_economics,
+    "min_score_info": UniversityProgram.min_score_info,
+}
+
+# Fields selectable with ?fields= on the full listing, which joins universities and programs
+UNIVERSITY_PROGRAM_LISTING_FIELDS = {
+    "university_id": UniversityProgram.university_id,
+    "university_name": University.name,
+    "program_id": UniversityProgram.program_id,
+    "program_name": Program.program_name,
+    **MIN_SCORE_FIELDS,
+}
+
+# Fields selectable with ?fields= on the per-university and per-program listings
+UNIVERSITY_PROGRAM_FIELDS = {
+    "id": UniversityProgram.id,
+    "university_id": UniversityProgram.university_id,
+    "program_id": UniversityProgram.program_id,
+    **MIN_SCORE_FIELDS,
+}
+
 # GET /university-programs -retrieve all university programs
 @router.get("/")
-def get_all_university_programs(db: Session = Depends(get_db)):
-    university_programs = (
-        db.query(UniversityProgram)
-        .join(University, UniversityProgram.university_id == University.id)
-        .join(Program, UniversityProgram.program_id == Program.program_id)
-        .all()
+def get_all_university_programs(request: Request, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_PROGRAM_LISTING_FIELDS)
+
+    def build_fieldset():
+        university_programs = (
+            db.query(*columns)
+            .select_from(UniversityProgram)
+            .join(University, UniversityProgram.university_id == University.id)
+            .join(Program, UniversityProgram.program_id == Program.program_id)
+            .all()
+        )
+        if not university_programs:
+            raise HTTPException(status_code=404, detail="No university-programs found")
+        return {"university_programs": rows_to_dicts(university_programs)}
+
+    def build():
+        university_programs = (
+            db.query(UniversityProgram)
+            .join(University, UniversityProgram.university_id == University.id)
+            .join(Program, UniversityProgram.program_id == Program.program_id)
+            .all()
+        )
+
+        if not university_programs:
+            raise HTTPException(status_code=404, detail="No university-programs found")
+
+        university_programs = [
+            {
+                "university_id": up.university_id,
+                "university_name": db.query(University).filter(University.id == up.university_id).first().name,
+                "program_id": up.program_id,
+                "program_name": db.query(Program).filter(Program.program_id == up.program_id).first().program_name,
+                "min_score_science": up.min_score_science,
+                "min_score_maths": up.min_score_maths,
+                "min_score_literature": up.min_score_literature,
+                "min_score_economics": up.min_score_economics,
+                "min_score_info": up.min_score_info,
+            }
+            for up in university_programs
+        ]
+
+        return {"university_programs": university_programs}
+
+    return catalog_response(
+        request,
+        ("university_programs", fieldset_key(columns)),
+        build_fieldset if columns else build,
     )
-    
-    if not university_programs:
-        raise HTTPException(status_code=404, detail="No university-programs found")
-
-    university_programs = [
-        {
-            "university_id": up.university_id,
-            "university_name": db.query(University).filter(University.id == up.university_id).first().name,
-            "program_id": up.program_id,
-            "program_name": db.query(Program).filter(Program.program_id == up.program_id).first().program_name,
-            "min_score_science": up.min_score_science,
-            "min_score_maths": up.min_score_maths,
-            "min_score_literature": up.min_score_literature,
-            "min_score_economics": up.min_score_economics,
-            "min_score_info": up.min_score_info,
-        }
-        for up in university_programs
-    ]
-
-    return {"university_programs": university_programs}
 
 # GET /university-programs/university/{university_id} - Retrieve programs by university
 @router.get("/university/{university_id}")
-def get_programs_by_university(university_id: int, db: Session = Depends(get_db)):
-    university_programs = db.query(UniversityProgram).filter(UniversityProgram.university_id == university_id).all()
+def get_programs_by_university(university_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_PROGRAM_FIELDS)
+    query = db.query(*columns) if columns else db.query(UniversityProgram)
+    university_programs = query.filter(UniversityProgram.university_id == university_id).all()
     if not university_programs:
         raise HTTPException(status_code=404, detail="No programs found for this university")
-    return {"programs": university_programs}
+    return {"programs": rows_to_dicts(university_programs) if columns else university_programs}
 
 # GET /university-programs/program/{program_id} - Retrieve universities by program
 @router.get("/program/{program_id}")
-def get_universities_by_program(program_id: int, db: Session = Depends(get_db)):
-    university_programs = db.query(UniversityProgram).filter(UniversityProgram.program_id == program_id).all()
+def get_universities_by_program(program_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, UNIVERSITY_PROGRAM_FIELDS)
+    query = db.query(*columns) if columns else db.query(UniversityProgram)
+    university_programs = query.filter(UniversityProgram.program_id == program_id).all()
     if not university_programs:
         raise HTTPException(status_code=404, detail="No universities found offering this program")
-    return {"universities": university_programs}
+    return {"universities": rows_to_dicts(university_programs) if columns else university_programs}
 
 # GET /university-programs/eligibility - Check eligibility based on student score
 @router.get("/eligibility")
@@ -89,3 +144,35 @@ def check_eligibility(
         return {"eligibility": True, "message": "The student is eligible for this program at the university."}
     else:
         return {"eligibility": False, "message": "The student does not meet the minimum score requirement."}
+
+# GET /university-programs/search - Filter university programs by location, university type, program type and
+# eligibility, with the number of matches for every facet value
+@router.get("/search")
+def search_university_programs(
+    location: Optional[List[str]] = Query(None),
+    university_type: Optional[List[str]] = Query(None),
+    program_type: Optional[List[str]] = Query(None),
+    section: Optional[str] = None,
+    score: Optional[float] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    if (section is None) != (score is None):
+        raise HTTPException(status_code=400, detail="section and score must be given together")
+    normalized = normalize_section(section)
+    if section is not None and normalized is None:
+        raise HTTPException(status_code=400, detail="Invalid baccalaureate section")
+
+    index = get_facet_index(db, get_catalog_version())
+    eligibility = index.eligible(normalized, score) if normalized is not None else None
+    filters = {"location": location, "university_type": university_type, "program_type": program_type}
+    page, total, facets = index.search(filters, eligibility, skip, limit)
+
+    return {
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "university_programs": rows_to_dicts(page),
+        "facets": facets,
+    }
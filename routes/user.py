@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
@@ -8,17 +9,59 @@ from app.models.career_model import CareerPath
 from app.models.program_model import Program
 from app.models.university_program_model import UniversityProgram
 from app.database import get_db  # Function to get the database session
+from app.sparse_fields import parse_fields, rows_to_dicts
+from app.write_batcher import run_write, write_batcher
 
 router = APIRouter()
 
+# Fields selectable with ?fields= on the user profile (the password hash is never selectable)
+USER_PROFILE_FIELDS = {
+    "id": User.id,
+    "username": User.username,
+    "baccalaureate_score": User.baccalaureate_score,
+    "baccalaureate_section": User.baccalaureate_section,
+    "career_path_id": User.career_path_id,
+}
+
+# Fields selectable with ?fields= on the user listing
+USER_LIST_FIELDS = {
+    "user_id": User.id,
+    "username": User.username,
+    "baccalaureate_score": User.baccalaureate_score,
+    "baccalaureate_section": User.baccalaureate_section,
+    "career_path_general": CareerPath.general_field,
+    "career_path_specific": CareerPath.specific_career_path,
+}
+
+# Fields selectable with ?fields= on the eligible university programs listing
+ELIGIBLE_PROGRAM_FIELDS = {
+    "id": UniversityProgram.id,
+    "university_name": University.name,
+    "university_location": University.location,
+    "program_name": Program.program_name,
+    "min_score_science": UniversityProgram.min_score_science,
+    "min_score_maths": UniversityProgram.min_score_maths,
+    "min_score_economics": UniversityProgram.min_score_economics,
+    "min_score_literature": UniversityProgram.min_score_literature,
+    "min_score_info": UniversityProgram.min_score_info,
+}
+
 # GET /user/profile/{username} - Retrieve user profile information by username
 @router.get("/profile/{username}")
-def get_user_profile_by_username(username: str, db: Session = Depends(get_db)):
+def get_user_profile_by_username(username: str, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, USER_PROFILE_FIELDS)
+
     # Query the database for the user by username
-    user = db.query(User).filter(User.username == username).first()
+    if columns:
+        user = db.query(*columns).filter(User.username == username).first()
+    else:
+        user = db.query(User).filter(User.username == username).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+
+    if columns:
+        return user._asdict()
     
     # Return the user profile information
     return {
@@ -47,24 +90,19 @@ def get_career_path_suggestions(
 def get_university_programs(
     baccalaureate_section: str,
     baccalaureate_score: float,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
+    columns = parse_fields(fields, ELIGIBLE_PROGRAM_FIELDS)
+
     # Construct the section field dynamically
     section_field = f"min_score_{baccalaureate_section.lower()}"
 
     # Query the database with the necessary joins
+    selected = columns or [column.label(name) for name, column in ELIGIBLE_PROGRAM_FIELDS.items()]
     programs = (
-        db.query(
-            UniversityProgram.id,
-            University.name.label("university_name"),
-            University.location.label("university_location"),
-            Program.program_name.label("program_name"),
-            UniversityProgram.min_score_science,
-            UniversityProgram.min_score_maths,
-            UniversityProgram.min_score_economics,
-            UniversityProgram.min_score_literature,
-            UniversityProgram.min_score_info
-        )
+        db.query(*selected)
+        .select_from(UniversityProgram)
         .join(University, UniversityProgram.university_id == University.id)  # Join Universities table
         .join(Program, UniversityProgram.program_id == Program.program_id)     # Join Programs table
         .filter(getattr(UniversityProgram, section_field) <= baccalaureate_score)  # Filter by baccalaureate score
@@ -75,6 +113,12 @@ def get_university_programs(
     if not programs:
         raise HTTPException(status_code=404, detail="No eligible university programs found.")
     
+    if columns:
+        return {
+            "message": "Eligible university programs fetched successfully",
+            "programs": rows_to_dicts(programs),
+        }
+
     # Structure the response
     formatted_programs = [
         {
@@ -98,8 +142,18 @@ def get_university_programs(
 
 # GET /users - Fetch all users with their scores, sections, and desired career paths
 @router.get("/users")
-def get_all_users(db: Session = Depends(get_db)):
+def get_all_users(fields: Optional[str] = None, db: Session = Depends(get_db)):
+    columns = parse_fields(fields, USER_LIST_FIELDS)
     try:
+        if columns:
+            users = db.query(*columns).select_from(User).outerjoin(CareerPath, User.career_path_id == CareerPath.id).all()
+            if not users:
+                raise HTTPException(status_code=404, detail="No users found in the database.")
+            return {
+                "message": "Users fetched successfully.",
+                "users": rows_to_dicts(users),
+            }
+
         # Query users with their career path details
         users = (
             db.query(
@@ -144,20 +198,21 @@ def update_user_career_path(
     career_path_id: int,
     db: Session = Depends(get_db),
 ):
-    # Retrieve the user by username
-    user = db.query(User).filter(User.username == username).first()
+    def update_career_path(session: Session):
+        # Retrieve the user by username
+        user = session.query(User).filter(User.username == username).first()
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found.")
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found.")
+
+        career_path = session.query(CareerPath).filter(CareerPath.id == career_path_id).first()
+        if not career_path:
+            raise HTTPException(status_code=404, detail="Career path not found.")
 
-    career_path = db.query(CareerPath).filter(CareerPath.id == career_path_id).first()
-    if not career_path:
-        raise HTTPException(status_code=404, detail="Career path not found.")
+        # Update the user's career path
+        user.career_path_id = career_path_id
 
-    # Update the user's career path
-    user.career_path_id = career_path_id
-    db.commit()
-    db.refresh(user)
+    run_write(db, update_career_path)
 
     return {
         "message": "Career path updated successfully.",
@@ -165,3 +220,7 @@ def update_user_career_path(
         "career_path_id": career_path_id,
     }
 
+# GET /users/write-batching/metrics - Batch sizes and queue wait times of the grouped user writes
+@router.get("/write-batching/metrics")
+def get_write_batching_metrics():
+    return write_batcher.metrics()
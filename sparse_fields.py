@@ -0,0 +1,34 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def parse_fields(fields: Optional[str], allowed: dict):
+    """Turn a comma separated `fields=` value into labelled columns from the endpoint's allow-list.
+
+    Returns None when no fieldset was requested, so the caller keeps its full response.
+    """
+    if fields is None:
+        return None
+
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="The fields parameter must name at least one field.")
+
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}.",
+        )
+
+    return [allowed[name].label(name) for name in names]
+
+
+def fieldset_key(columns):
+    # Part of the cache key for responses that support sparse fieldsets
+    return tuple(column.key for column in columns) if columns else None
+
+
+def rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
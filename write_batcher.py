@@ -0,0 +1,157 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import HTTPException
+
+from app.config import WRITE_BATCHING_ENABLED, WRITE_BATCH_MAX_SIZE, WRITE_BATCH_MAX_WAIT_MS
+from app.database import SessionLocal
+
+
+class WriteBatcher:
+    """Groups small writes submitted within a few milliseconds into a single transaction.
+
+    A write is a callable taking a session. It should raise (for example an HTTPException) before
+    touching the session when it cannot proceed, so that only its own caller sees the error. If the
+    batch fails to flush or commit, every write of the batch is replayed in its own transaction and
+    each caller gets its own outcome, such as the IntegrityError of a duplicate username.
+    """
+
+    def __init__(self, session_factory, max_wait_ms, max_batch_size):
+        self.session_factory = session_factory
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "batches": 0,
+            "writes": 0,
+            "replayed_batches": 0,
+            "max_batch_size": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+
+    def submit(self, operation):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._worker, name="write-batcher", daemon=True)
+                    self._thread.start()
+        future = Future()
+        self._queue.put((operation, future, time.monotonic()))
+        return future
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        started = time.monotonic()
+        outcomes = self._run_together(batch)
+        replayed = outcomes is None
+        if replayed:
+            outcomes = [self._run_alone(operation) for operation, _, _ in batch]
+        self._record(batch, started, replayed)
+
+        for (_, future, _), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run_together(self, batch):
+        """Run the whole batch in one transaction, or return None when it has to be replayed write by write."""
+        session = self.session_factory(expire_on_commit=False)
+        outcomes = []
+        try:
+            for operation, _, _ in batch:
+                try:
+                    result = operation(session)
+                except HTTPException as error:
+                    # Rejected before writing anything, the rest of the batch is unaffected
+                    if session.new or session.dirty or session.deleted:
+                        session.rollback()
+                        return None
+                    outcomes.append((None, error))
+                    continue
+                session.flush()
+                outcomes.append((result, None))
+            session.commit()
+            return outcomes
+        except Exception:
+            session.rollback()
+            return None
+        finally:
+            session.close()
+
+    def _run_alone(self, operation):
+        session = self.session_factory(expire_on_commit=False)
+        try:
+            result = operation(session)
+            session.commit()
+            return result, None
+        except Exception as error:
+            session.rollback()
+            return None, error
+        finally:
+            session.close()
+
+    def _record(self, batch, started, replayed):
+        waits = [(started - submitted) * 1000 for _, _, submitted in batch]
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics["batches"] += 1
+            metrics["writes"] += len(batch)
+            metrics["replayed_batches"] += int(replayed)
+            metrics["max_batch_size"] = max(metrics["max_batch_size"], len(batch))
+            metrics["total_wait_ms"] += sum(waits)
+            metrics["max_wait_ms"] = max(metrics["max_wait_ms"], max(waits))
+            metrics["total_commit_ms"] += (time.monotonic() - started) * 1000
+
+    def metrics(self):
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        batches = metrics["batches"] or 1
+        writes = metrics["writes"] or 1
+        return {
+            "enabled": WRITE_BATCHING_ENABLED,
+            "batches": metrics["batches"],
+            "writes": metrics["writes"],
+            "replayed_batches": metrics["replayed_batches"],
+            "average_batch_size": metrics["writes"] / batches,
+            "max_batch_size": metrics["max_batch_size"],
+            "average_wait_ms": metrics["total_wait_ms"] / writes,
+            "max_wait_ms": metrics["max_wait_ms"],
+            "average_commit_ms": metrics["total_commit_ms"] / batches,
+            "queued": self._queue.qsize(),
+        }
+
+
+write_batcher = WriteBatcher(SessionLocal, WRITE_BATCH_MAX_WAIT_MS, WRITE_BATCH_MAX_SIZE)
+
+
+def run_write(db, operation):
+    """Run `operation(session)` and commit it, grouped with concurrent writes when batching is enabled."""
+    if not WRITE_BATCHING_ENABLED:
+        result = operation(db)
+        db.commit()
+        return result
+
+    # Give the request's connection back to the pool while waiting, the batch commits on its own session
+    db.close()
+    return write_batcher.submit(operation).result()